@@ -5,6 +5,11 @@ Analyse un fichier unique ou tous les fichiers d'un dossier
 Génère un rapport HTML
 """
 
+import asyncio
+import bisect
+import math
+import os
+import shutil
 import subprocess
 import sys
 import json
@@ -14,20 +19,46 @@ from pathlib import Path
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    import orjson  # Optionnel : accélère nettement l'export JSON
+except ImportError:
+    orjson = None
 
-def apply_audio_correction(file_path: str, gain_db: float, output_path: str) -> bool:
-    """Applique un gain audio à un fichier."""
-    
-    cmd = [
-        "ffmpeg",
-        "-y",  # Overwrite
-        "-i", str(file_path),
-        "-af", f"volume={gain_db}dB",
-        "-c:v", "copy",  # Copie vidéo sans réencodage
-        "-c:a", "aac",   # Réencode audio en AAC
-        "-b:a", "192k",
-        str(output_path)
-    ]
+try:
+    import numpy  # Optionnel : vectorise les calculs du rapport HTML
+except ImportError:
+    numpy = None
+
+
+def apply_audio_correction(file_path: str, gain_db: float, output_path: str,
+                           lossless: bool = False) -> bool:
+    """Applique un gain audio à un fichier.
+
+    En mode lossless, aucun ré-encodage : les flux sont copiés tels quels
+    et le gain est écrit en tag ReplayGain, appliqué par le lecteur.
+    """
+
+    if lossless:
+        cmd = [
+            "ffmpeg",
+            "-y",  # Overwrite
+            "-i", str(file_path),
+            "-c", "copy",  # Copie intégrale, pas de décodage
+            "-metadata:s:a:0", f"replaygain_track_gain={gain_db:.2f} dB",
+            str(output_path)
+        ]
+    else:
+        cmd = [
+            "ffmpeg",
+            "-y",  # Overwrite
+            "-i", str(file_path),
+            "-af", f"volume={gain_db}dB",
+            "-c:v", "copy",  # Copie vidéo sans réencodage
+            "-c:a", "aac",   # Réencode audio en AAC
+            "-b:a", "192k",
+            "-threads", "2",  # Borne chaque encodage : le parallélisme vient du pool
+            str(output_path)
+        ]
     
     try:
         result = subprocess.run(
@@ -41,61 +72,339 @@ def apply_audio_correction(file_path: str, gain_db: float, output_path: str) ->
         return False
 
 
-def analyze_audio_level(file_path: str) -> dict:
-    """Analyse le niveau sonore d'un fichier vidéo/audio."""
-    
+# Motifs précompilés, appliqués directement sur le stderr binaire de ffmpeg
+# (une seule passe sur le tampon, pas de décodage UTF-8 intermédiaire).
+_VOL_RE = re.compile(
+    rb"mean_volume:\s*([-\d.]+)\s*dB.*?max_volume:\s*([-\d.]+)\s*dB",
+    re.S
+)
+
+# Échantillonnage : trois segments de 60 s (début, milieu, fin) au lieu
+# d'un décodage intégral. Ne vaut le coup que si le fichier est nettement
+# plus long que les segments eux-mêmes.
+SAMPLE_DURATION = 60
+_SAMPLE_MIN_DURATION = 3 * SAMPLE_DURATION * 2
+
+# Niveau de référence ReplayGain : le gain stocké ramène la piste à ce
+# niveau, donc niveau mesuré = référence - gain.
+_REPLAYGAIN_REF_DB = -18.0
+
+# Sous-échantillonnage avant mesure : volumedetect est une statistique de
+# niveau, mono 8 kHz suffit et divise les échantillons à traiter par ~6-12.
+# Placé AVANT volumedetect dans la chaîne de filtres (en option de sortie,
+# le rééchantillonnage arriverait après la mesure).
+_DOWNMIX = "aformat=channel_layouts=mono:sample_rates=8000"
+
+
+async def _read_volume_lines(proc, timeout: float,
+                             markers: tuple = (b"volume:",)) -> bytes:
+    """Lit le stderr de ffmpeg en flux, ne retenant que les lignes de mesure.
+
+    Évite de tamponner tout le stderr en mémoire : seules les quelques
+    lignes contenant un des marqueurs sont conservées, quel que soit le
+    volume de log émis. Lève asyncio.TimeoutError au-delà de `timeout`.
+    """
+
+    lines = []
+
+    async def _drain():
+        async for line in proc.stderr:
+            if any(marker in line for marker in markers):
+                lines.append(line)
+        await proc.wait()
+
+    await asyncio.wait_for(_drain(), timeout)
+    return b"".join(lines)
+
+
+def _build_result(path: Path, mean_db: float, max_db: float) -> dict:
+    """Construit le dict de résultat standard à partir des niveaux mesurés."""
+    level = classify_level(mean_db)
+    return {
+        "fichier": path.name,
+        "chemin": str(path),
+        "niveau_moyen_db": mean_db,
+        "niveau_max_db": max_db,
+        "classification": level["label"],
+        "color": level["color"],
+        "emoji": level["emoji"]
+    }
+
+
+async def _probe_file_async(path: Path) -> dict:
+    """Interroge ffprobe : durée du conteneur + side-data ReplayGain.
+
+    Un seul appel ffprobe (lecture d'en-têtes, pas de décodage) fournit
+    tout ce qu'il faut pour choisir la stratégie d'analyse.
+    """
+
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "a:0",
+        # stream_side_data se filtre par champ, pas par type de side-data :
+        # on demande les champs ReplayGain et on ignore les autres types
+        "-show_entries", "format=duration:stream_side_data=side_data_type,track_gain,track_peak",
+        "-of", "json",
+        str(path)
+    ]
+
+    probe = {"duration": None, "gain": None, "peak": None}
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=60)
+        data = json.loads(stdout)
+    except (asyncio.TimeoutError, ValueError, OSError):
+        return probe
+
+    try:
+        probe["duration"] = float(data["format"]["duration"])
+    except (KeyError, ValueError):
+        pass
+
+    for stream in data.get("streams", []):
+        for side_data in stream.get("side_data_list", []):
+            if "track_gain" in side_data:
+                try:
+                    probe["gain"] = float(side_data["track_gain"])
+                    probe["peak"] = float(side_data.get("track_peak"))
+                except (TypeError, ValueError):
+                    probe["gain"] = probe["peak"] = None
+
+    return probe
+
+
+async def _analyze_sampled_async(path: Path, duration: float) -> dict:
+    """Mesure volumedetect sur trois segments de 60 s au lieu du fichier entier."""
+
+    offsets = (0, duration / 2 - SAMPLE_DURATION / 2, duration - SAMPLE_DURATION)
+
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", "-loglevel", "info"]
+    for offset in offsets:
+        cmd.extend(["-ss", f"{offset:.3f}", "-t", str(SAMPLE_DURATION), "-i", str(path)])
+    cmd.extend([
+        "-filter_complex", f"[0:a][1:a][2:a]concat=n=3:v=0:a=1,{_DOWNMIX},volumedetect",
+        # Sans -vn, la sélection automatique décoderait aussi la vidéo
+        # de chaque segment vers la sortie null
+        "-vn", "-sn", "-dn",
+        "-f", "null", "-"
+    ])
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stderr = await _read_volume_lines(proc, timeout=300)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+    except Exception:
+        return None
+
+    m = _VOL_RE.search(stderr)
+    if m is None:
+        return None
+
+    return _build_result(path, float(m.group(1)), float(m.group(2)))
+
+
+async def analyze_audio_level_async(file_path: str, full: bool = False,
+                                    metrics: bool = False) -> dict:
+    """Analyse le niveau sonore d'un fichier vidéo/audio (coroutine).
+
+    Par défaut, évite le décodage intégral quand c'est possible :
+    tags ReplayGain lus gratuitement via ffprobe, puis échantillonnage
+    sur trois segments pour les fichiers longs. `full=True` force le
+    décodage complet historique. `metrics=True` ajoute RMS, LUFS intégré
+    et pic réel, mesurés dans la même passe de décodage que volumedetect.
+    """
+
     path = Path(file_path)
     if not path.exists():
         return {"fichier": path.name, "error": "Fichier non trouvé"}
-    
+
+    if not full and not metrics:
+        probe = await _probe_file_async(path)
+
+        if probe["gain"] is not None and probe["peak"]:
+            mean_db = _REPLAYGAIN_REF_DB - probe["gain"]
+            max_db = 20 * math.log10(probe["peak"])
+            return _build_result(path, mean_db, max_db)
+
+        if probe["duration"] is not None and probe["duration"] > _SAMPLE_MIN_DURATION:
+            result = await _analyze_sampled_async(path, probe["duration"])
+            if result is not None:
+                return result
+
     cmd = [
         "ffmpeg",
+        # Réduit le stderr au strict nécessaire : volumedetect logge au
+        # niveau info, le reste (bannière, stats de progression) est coupé.
+        "-hide_banner", "-nostats", "-loglevel", "info",
         "-i", str(file_path),
-        "-af", "volumedetect",
+        # Le ? rend le map optionnel : un fichier sans audio échoue
+        # proprement dans la branche « Pas de piste audio ».
+        # En mode metrics, pas de sous-échantillonnage : ebur128 mesure
+        # le LUFS/pic réel sur le flux d'origine.
+        "-map", "0:a:0?",
+        "-af", _METRICS_FILTERS if metrics else f"{_DOWNMIX},volumedetect",
         "-vn", "-sn", "-dn",
+        "-threads", "1",
         "-f", "null", "-"
     ]
-    
+
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
         )
-        
-        stderr = result.stderr
-        
-        mean_match = re.search(r"mean_volume:\s*([-\d.]+)\s*dB", stderr)
-        max_match = re.search(r"max_volume:\s*([-\d.]+)\s*dB", stderr)
-        
-        if not mean_match or not max_match:
+
+        try:
+            stderr = await _read_volume_lines(
+                proc, timeout=300,
+                markers=_METRICS_MARKERS if metrics else (b"volume:",)
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return {"fichier": path.name, "error": "Timeout"}
+
+        m = _VOL_RE.search(stderr)
+
+        if m is None:
             return {"fichier": path.name, "error": "Pas de piste audio"}
-        
-        mean_db = float(mean_match.group(1))
-        max_db = float(max_match.group(1))
-        level = classify_level(mean_db)
-        
-        return {
-            "fichier": path.name,
-            "chemin": str(path),
-            "niveau_moyen_db": mean_db,
-            "niveau_max_db": max_db,
-            "classification": level["label"],
-            "color": level["color"],
-            "emoji": level["emoji"]
-        }
-        
-    except subprocess.TimeoutExpired:
-        return {"fichier": path.name, "error": "Timeout"}
+
+        result = _build_result(path, float(m.group(1)), float(m.group(2)))
+
+        if metrics:
+            # astats logge le RMS par canal puis global, et ebur128 un I:
+            # intermédiaire par trame avant le résumé : on garde le dernier
+            rms = _RMS_RE.findall(stderr)
+            if rms:
+                result["rms_db"] = float(rms[-1])
+            lufs = _LUFS_RE.findall(stderr)
+            if lufs:
+                result["lufs_integre"] = float(lufs[-1])
+            peak = _TRUE_PEAK_RE.search(stderr)
+            if peak:
+                result["pic_reel_db"] = float(peak.group(1))
+
+        return result
+
     except Exception as e:
         return {"fichier": path.name, "error": str(e)}
 
 
+def analyze_audio_level(file_path: str, full: bool = False, metrics: bool = False) -> dict:
+    """Analyse le niveau sonore d'un fichier (enveloppe synchrone pour la CLI)."""
+    return asyncio.run(analyze_audio_level_async(file_path, full=full, metrics=metrics))
+
+
+# Taille de lot : borne le volume de stderr à parser et garde la
+# barre de progression granulaire.
+BATCH_SIZE = 32
+
+# Métriques étendues (mode --metrics) : une seule passe de décodage
+# alimente volumedetect, astats et ebur128, parsés dans le même stderr.
+_RMS_RE = re.compile(rb"RMS level dB:\s*([-\d.]+)")
+_LUFS_RE = re.compile(rb"I:\s*([-\d.]+)\s*LUFS")
+_TRUE_PEAK_RE = re.compile(rb"Peak:\s*([-\d.]+)\s*dBFS")
+
+_METRICS_FILTERS = "volumedetect,astats,ebur128=peak=true"
+_METRICS_MARKERS = (b"volume:", b"RMS level dB", b"I:", b"Peak:")
+
+_BATCH_VOL_RE = re.compile(
+    rb"\[Parsed_volumedetect_(\d+).*?"
+    rb"mean_volume:\s*([-\d.]+)\s*dB.*?"
+    rb"max_volume:\s*([-\d.]+)\s*dB",
+    re.S
+)
+
+
+async def batch_analyze_async(file_paths: list) -> list:
+    """Analyse un lot de fichiers en une seule invocation ffmpeg.
+
+    Amortit le coût de lancement d'un processus ffmpeg par fichier :
+    chaque entrée passe par son propre filtre volumedetect étiqueté, et
+    le stderr est parsé une seule fois. Retourne None si la sortie n'est
+    pas exploitable (l'appelant retombe sur l'analyse fichier par fichier).
+    """
+
+    cmd = ["ffmpeg", "-hide_banner", "-nostats", "-loglevel", "info"]
+    for f in file_paths:
+        cmd.extend(["-i", str(f)])
+
+    filter_complex = ";".join(
+        f"[{i}:a]{_DOWNMIX},volumedetect[a{i}]" for i in range(len(file_paths))
+    )
+    cmd.extend(["-filter_complex", filter_complex])
+    for i in range(len(file_paths)):
+        cmd.extend(["-map", f"[a{i}]"])
+    cmd.extend(["-f", "null", "-"])
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        try:
+            stderr = await _read_volume_lines(proc, timeout=300 * len(file_paths))
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+    except Exception:
+        return None
+
+    # L'index Parsed_volumedetect_N compte TOUS les filtres du graphe
+    # (aformat compris), pas seulement les volumedetect : il n'est donc
+    # pas égal à l'index d'entrée, mais il croît dans l'ordre des entrées.
+    # On apparie par rang croissant.
+    measures = {}
+    for m in _BATCH_VOL_RE.finditer(stderr):
+        measures[int(m.group(1))] = (float(m.group(2)), float(m.group(3)))
+
+    if len(measures) != len(file_paths):
+        return None
+
+    results = []
+    for f, key in zip(file_paths, sorted(measures)):
+        mean_db, max_db = measures[key]
+        results.append(_build_result(Path(f), mean_db, max_db))
+    return results
+
+
+# Échelle adaptée pour du contenu voix/conférence. Seuils et niveaux sont
+# alignés : _LEVELS[i] couvre [_LEVEL_THRESHOLDS[i-1], _LEVEL_THRESHOLDS[i][
+# (une valeur exactement sur un seuil tombe dans le niveau supérieur,
+# comme avec la chaîne de < stricts d'origine).
+_LEVEL_THRESHOLDS = (-50, -42, -36, -30, -24)
+
+_LEVELS = (
+    {"label": "TRÈS BAS", "color": "#ef4444", "emoji": "🔇"},  # Rouge = problème
+    {"label": "BAS", "color": "#f97316", "emoji": "🔈"},       # Orange
+    {"label": "MOYEN-", "color": "#eab308", "emoji": "🔉"},    # Jaune
+    {"label": "MOYEN", "color": "#22c55e", "emoji": "🔊"},     # Vert = OK
+    {"label": "MOYEN+", "color": "#10b981", "emoji": "🔊"},    # Vert foncé = bien
+    {"label": "ÉLEVÉ", "color": "#3b82f6", "emoji": "📢"},     # Bleu = fort
+)
+
+
 def classify_level(mean_db: float) -> dict:
     """
     Classifie le niveau sonore basé sur la moyenne en dB.
-    
+
     Échelle adaptée pour du contenu voix/conférence:
     - Très bas:  < -50 dB (quasi inaudible, problème d'enregistrement)
     - Bas:       -50 à -42 dB (faible, à normaliser)
@@ -104,32 +413,80 @@ def classify_level(mean_db: float) -> dict:
     - Moyen+:    -30 à -24 dB (bon niveau)
     - Élevé:     > -24 dB (fort, proche broadcast)
     """
-    
-    if mean_db < -50:
-        return {"label": "TRÈS BAS", "color": "#ef4444", "emoji": "🔇"}  # Rouge = problème
-    elif mean_db < -42:
-        return {"label": "BAS", "color": "#f97316", "emoji": "🔈"}  # Orange
-    elif mean_db < -36:
-        return {"label": "MOYEN-", "color": "#eab308", "emoji": "🔉"}  # Jaune
-    elif mean_db < -30:
-        return {"label": "MOYEN", "color": "#22c55e", "emoji": "🔊"}  # Vert = OK
-    elif mean_db < -24:
-        return {"label": "MOYEN+", "color": "#10b981", "emoji": "🔊"}  # Vert foncé = bien
-    else:
-        return {"label": "ÉLEVÉ", "color": "#3b82f6", "emoji": "📢"}  # Bleu = fort
+
+    return _LEVELS[bisect.bisect_right(_LEVEL_THRESHOLDS, mean_db)]
+
+
+# Évalué une fois : détermine si la barre peut se réécrire sur place
+_IS_TTY = sys.stdout.isatty()
 
 
 def print_progress_bar(current, total, width=50):
-    """Affiche une barre de progression."""
+    """Affiche une barre de progression (sortie réduite hors terminal)."""
     percent = current / total
+
+    if not _IS_TTY:
+        # Hors TTY (CI, tee...), chaque \r devient une ligne complète :
+        # n'émet qu'environ un jalon sur cent, plus le dernier.
+        step = max(1, total // 100)
+        if current % step == 0 or current == total:
+            print(f"  ⏳ {current}/{total} ({percent*100:.0f}%)")
+        return
+
     filled = int(width * percent)
     bar = "█" * filled + "░" * (width - filled)
     sys.stdout.write(f"\r  ⏳ [{bar}] {current}/{total} ({percent*100:.0f}%)")
     sys.stdout.flush()
 
 
-def analyze_folder(folder_path: str, extensions: list = None, workers: int = 4) -> list:
+# Cache des résultats, posé à côté des fichiers analysés.
+# Clé : (nom, taille, mtime) — l'invalidation est automatique dès que
+# le fichier change, pas besoin de TTL.
+CACHE_FILENAME = ".audio_levels_cache.json"
+
+
+def _load_cache(cache_path: Path) -> dict:
+    """Charge le cache de résultats (dict vide si absent ou corrompu)."""
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_path: Path, cache: dict):
+    """Écrit le cache de façon atomique (fichier temporaire + os.replace)."""
+    tmp_path = str(cache_path) + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Dossier en lecture seule : on analyse sans cache
+
+
+def _cache_key(path: str, variant: str = "") -> str:
+    """Clé de cache d'un fichier, qualifiée par le mode d'analyse.
+
+    Les modes ne mesurent pas la même chose (échantillonné par défaut,
+    décodage intégral en --full, métriques étendues en --metrics) : un
+    résultat mis en cache dans un mode ne doit pas être resservi dans un
+    autre. Retourne None si le fichier a disparu entre-temps.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.basename(path)}|{stat.st_size}|{int(stat.st_mtime)}|{variant}"
+
+
+def analyze_folder(folder_path: str, extensions: list = None, workers: int = None,
+                   use_cache: bool = True, full: bool = False,
+                   metrics: bool = False) -> list:
     """Analyse tous les fichiers vidéo/audio d'un dossier."""
+
+    if workers is None:
+        workers = os.cpu_count() or 4
     
     if extensions is None:
         extensions = [".mp4", ".mkv", ".avi", ".mov", ".webm", ".mp3", ".wav", ".m4a"]
@@ -138,47 +495,148 @@ def analyze_folder(folder_path: str, extensions: list = None, workers: int = 4)
     if not folder.is_dir():
         return [{"error": f"Dossier non trouvé: {folder_path}"}]
     
-    # Trouve tous les fichiers
-    files = []
-    for ext in extensions:
-        files.extend(folder.glob(f"*{ext}"))
-        files.extend(folder.glob(f"*{ext.upper()}"))
-    
-    files = sorted(set(files))
+    # Trouve tous les fichiers en un seul parcours du dossier
+    # (insensible à la casse des extensions : .mp4, .MP4, .Mp4...).
+    # Les chemins restent des str : pas d'objet Path par fichier dans la
+    # boucle chaude, les sous-processus et le cache consomment des str.
+    # Les fichiers cachés sont exclus, comme avec glob (évite notamment
+    # les doublons AppleDouble « ._video.mp4 » sur les partages réseau).
+    exts = frozenset(e.lower() for e in extensions)
+    files = sorted(
+        entry.path
+        for entry in os.scandir(folder)
+        if entry.is_file()
+        and not entry.name.startswith('.')
+        and os.path.splitext(entry.name)[1].lower() in exts
+    )
     
     if not files:
         return [{"error": f"Aucun fichier trouvé dans {folder_path}"}]
     
     print(f"\n🔍 {len(files)} fichier(s) trouvé(s)")
     print(f"📂 {folder_path}\n")
-    
-    results = []
-    completed = 0
-    
-    # Analyse parallèle avec barre de progression
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {executor.submit(analyze_audio_level, str(f)): f for f in files}
-        
-        for future in as_completed(futures):
-            result = future.result()
-            results.append(result)
+
+    # Court-circuite les fichiers inchangés depuis la dernière exécution
+    cache_path = folder / CACHE_FILENAME
+    cache = _load_cache(cache_path) if use_cache else {}
+    cache_variant = "metrics" if metrics else ("full" if full else "")
+    cached_results = []
+    to_analyze = []
+    for f in files:
+        key = _cache_key(f, cache_variant)
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            cached_results.append(cached)
+        else:
+            to_analyze.append(f)
+
+    if cached_results:
+        print(f"💾 {len(cached_results)} fichier(s) depuis le cache")
+
+    files = to_analyze
+
+    # Analyse parallèle avec barre de progression :
+    # une seule boucle d'événements multiplexe tous les pipes ffmpeg,
+    # le sémaphore borne le nombre de processus concurrents.
+    # Par défaut, analyse fichier par fichier (tags ReplayGain puis
+    # échantillonnage pour les fichiers longs). En mode `full`, décodage
+    # intégral par lots (une invocation ffmpeg par lot) avec retour à
+    # l'analyse fichier par fichier si un lot n'est pas parsable.
+    async def _analyze_all():
+        sem = asyncio.Semaphore(workers)
+        completed = 0
+
+        async def _bounded_file(f):
+            nonlocal completed
+            async with sem:
+                result = await analyze_audio_level_async(f, full=full, metrics=metrics)
             completed += 1
             print_progress_bar(completed, len(files))
-    
+            return result
+
+        async def _bounded_batch(chunk):
+            nonlocal completed
+            async with sem:
+                batch_results = await batch_analyze_async(chunk)
+                if batch_results is None:
+                    batch_results = []
+                    for f in chunk:
+                        batch_results.append(await analyze_audio_level_async(f, full=full))
+                        completed += 1
+                        print_progress_bar(completed, len(files))
+                    return batch_results
+            completed += len(chunk)
+            print_progress_bar(completed, len(files))
+            return batch_results
+
+        # Le mode metrics impose la passe fusionnée fichier par fichier
+        if metrics or not full:
+            return list(await asyncio.gather(*[_bounded_file(f) for f in files]))
+
+        chunks = [files[i:i + BATCH_SIZE] for i in range(0, len(files), BATCH_SIZE)]
+        chunk_results = await asyncio.gather(*[_bounded_batch(c) for c in chunks])
+        return [r for chunk in chunk_results for r in chunk]
+
+    results = asyncio.run(_analyze_all()) if files else []
+
     print("\n")  # Nouvelle ligne après la barre
-    
+
+    # Mémorise les nouveaux résultats valides pour les prochaines exécutions
+    if use_cache:
+        for r in results:
+            if 'error' not in r:
+                key = _cache_key(r['chemin'], cache_variant)
+                if key is not None:
+                    cache[key] = r
+        _save_cache(cache_path, cache)
+
+    results.extend(cached_results)
+
     # Trie par nom de fichier
     results.sort(key=lambda x: x.get('fichier', ''))
-    
+
     return results
 
 
-def generate_html_report(results: list, folder_path: str, output_path: str):
+# Ligne du tableau de détail, définie une seule fois hors de la boucle
+# de rendu : chaque ligne n'est plus qu'un format_map sur le dict résultat.
+_ROW_TEMPLATE = '''
+                    <tr>
+                        <td>{fichier}</td>
+                        <td>
+                            <span class="db-value">{niveau_moyen_db:.1f} dB</span>
+                            <div class="db-bar">
+                                <div class="db-bar-fill" style="width: {_pct:.1f}%; background: {color};"></div>
+                            </div>
+                        </td>
+                        <td><span class="db-value">{niveau_max_db:.1f} dB</span></td>
+                        <td><span class="level-badge" style="background: {color}20; color: {color};">{emoji} {classification}</span></td>{_extra}
+                    </tr>
+'''
+
+
+def _metrics_cells(r: dict) -> str:
+    """Cellules optionnelles RMS / LUFS / pic réel (tiret si non mesuré)."""
+    cells = []
+    for key, unit in (("rms_db", "dB"), ("lufs_integre", "LUFS"), ("pic_reel_db", "dBFS")):
+        value = r.get(key)
+        text = f"{value:.1f} {unit}" if value is not None else "–"
+        cells.append(f'\n                        <td><span class="db-value">{text}</span></td>')
+    return "".join(cells)
+
+
+def generate_html_report(valid_results: list, errors: list, folder_path: str, output_path: str):
     """Génère un rapport HTML."""
-    
-    valid_results = [r for r in results if 'error' not in r]
-    errors = [r for r in results if 'error' in r]
-    
+
+    with open(output_path, 'w', encoding='utf-8') as fp:
+        _write_html_report(fp, valid_results, errors, folder_path)
+
+    print(f"📄 Rapport HTML: {output_path}")
+
+
+def _write_html_report(fp, valid_results: list, errors: list, folder_path: str):
+    """Écrit le contenu du rapport dans un fichier déjà ouvert."""
+
     # Statistiques
     if valid_results:
         means = [r['niveau_moyen_db'] for r in valid_results]
@@ -195,8 +653,9 @@ def generate_html_report(results: list, folder_path: str, output_path: str):
         avg_mean = min_mean = max_mean = 0
         levels_count = {}
     
-    # Génération HTML
-    html = f'''<!DOCTYPE html>
+    # Génération HTML, écrite en flux dans le fichier de sortie
+    # (pas d'accumulation quadratique via concaténation de chaînes)
+    fp.write(f'''<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -370,32 +829,32 @@ def generate_html_report(results: list, folder_path: str, output_path: str):
         <div class="section">
             <h2 class="section-title">📊 Répartition par niveau</h2>
             <div class="distribution">
-'''
-    
-    level_colors = {
-        "TRÈS BAS": "#ef4444",  # Rouge = problème
-        "BAS": "#f97316",       # Orange
-        "MOYEN-": "#eab308",    # Jaune
-        "MOYEN": "#22c55e",     # Vert = OK
-        "MOYEN+": "#10b981",    # Vert foncé = bien
-        "ÉLEVÉ": "#3b82f6"      # Bleu = fort
-    }
-    
-    for level in ["TRÈS BAS", "BAS", "MOYEN-", "MOYEN", "MOYEN+", "ÉLEVÉ"]:
-        count = levels_count.get(level, 0)
+''')
+
+
+    # Couleurs et ordre dérivés de la même table que classify_level
+    for level in _LEVELS:
+        count = levels_count.get(level["label"], 0)
         if count > 0:
             width = max(30, count * 20)
-            html += f'''
+            fp.write(f'''
                 <div class="dist-item">
-                    <span>{level}</span>
-                    <div class="dist-bar" style="background: {level_colors[level]}; width: {width}px;">{count}</div>
+                    <span>{level["label"]}</span>
+                    <div class="dist-bar" style="background: {level["color"]}; width: {width}px;">{count}</div>
                 </div>
-'''
-    
-    html += '''
+''')
+
+    # Colonnes supplémentaires si au moins un fichier porte les métriques
+    # étendues (mode --metrics)
+    has_metrics = any("lufs_integre" in r or "rms_db" in r for r in valid_results)
+    extra_headers = ('\n                        <th>RMS</th>'
+                     '\n                        <th>LUFS</th>'
+                     '\n                        <th>Pic réel</th>') if has_metrics else ''
+
+    fp.write(f'''
             </div>
         </div>
-        
+
         <div class="section">
             <h2 class="section-title">📋 Détail des fichiers</h2>
             <table>
@@ -404,70 +863,63 @@ def generate_html_report(results: list, folder_path: str, output_path: str):
                         <th>Fichier</th>
                         <th>Niveau moyen</th>
                         <th>Niveau max</th>
-                        <th>Classification</th>
+                        <th>Classification</th>{extra_headers}
                     </tr>
                 </thead>
                 <tbody>
-'''
-    
-    for r in valid_results:
-        # Calcul pourcentage pour la barre (de -50dB à 0dB)
-        percent = min(max((r['niveau_moyen_db'] + 50) / 50 * 100, 0), 100)
-        
-        html += f'''
-                    <tr>
-                        <td>{r['fichier']}</td>
-                        <td>
-                            <span class="db-value">{r['niveau_moyen_db']:.1f} dB</span>
-                            <div class="db-bar">
-                                <div class="db-bar-fill" style="width: {percent}%; background: {r['color']};"></div>
-                            </div>
-                        </td>
-                        <td><span class="db-value">{r['niveau_max_db']:.1f} dB</span></td>
-                        <td><span class="level-badge" style="background: {r['color']}20; color: {r['color']};">{r['emoji']} {r['classification']}</span></td>
-                    </tr>
-'''
-    
-    html += '''
+''')
+
+    # Calcul des pourcentages pour les barres (de -50dB à 0dB), vectorisé
+    # en une passe quand numpy est disponible plutôt que min/max par ligne
+    if numpy is not None:
+        means = numpy.fromiter(
+            (r['niveau_moyen_db'] for r in valid_results),
+            dtype=numpy.float32, count=len(valid_results)
+        )
+        percents = numpy.clip((means + 50.0) * 2.0, 0.0, 100.0)
+    else:
+        percents = [
+            min(max((r['niveau_moyen_db'] + 50) * 2, 0), 100)
+            for r in valid_results
+        ]
+
+    for r, percent in zip(valid_results, percents):
+        extra = _metrics_cells(r) if has_metrics else ''
+        fp.write(_ROW_TEMPLATE.format_map({**r, "_pct": percent, "_extra": extra}))
+
+    fp.write('''
                 </tbody>
             </table>
         </div>
-'''
-    
+''')
+
     if errors:
-        html += '''
+        fp.write('''
         <div class="section">
             <h2 class="section-title">⚠️ Erreurs</h2>
             <ul class="error-list">
-'''
+''')
         for e in errors:
-            html += f'                <li>{e["fichier"]}: {e["error"]}</li>\n'
-        
-        html += '''
+            fp.write(f'                <li>{e["fichier"]}: {e["error"]}</li>\n')
+
+        fp.write('''
             </ul>
         </div>
-'''
-    
-    html += '''
+''')
+
+    fp.write('''
         <div class="footer">
             Généré par Audio Level Analyzer
         </div>
     </div>
 </body>
 </html>
-'''
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
-    
-    print(f"📄 Rapport HTML: {output_path}")
+''')
 
 
-def export_csv(results: list, output_path: str):
+def export_csv(valid_results: list, output_path: str):
     """Exporte les résultats en CSV."""
-    
-    valid_results = [r for r in results if 'error' not in r]
-    
+
     with open(output_path, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(['Fichier', 'Niveau Moyen (dB)', 'Niveau Max (dB)', 'Classification'])
@@ -483,22 +935,38 @@ def export_csv(results: list, output_path: str):
     print(f"📊 Export CSV: {output_path}")
 
 
-def print_summary(results: list):
+def print_summary(valid_results: list, errors: list):
     """Affiche un résumé court dans le terminal."""
-    
-    valid_results = [r for r in results if 'error' not in r]
-    errors = [r for r in results if 'error' in r]
-    
+
     print("✅ Analyse terminée!")
     print(f"   • {len(valid_results)} fichier(s) analysé(s)")
     if errors:
         print(f"   • {len(errors)} erreur(s)")
 
 
-def process_corrections(results: list, folder_path: str, mode: str, value: float):
+# En deçà de ce gain, la correction est inaudible : inutile de ré-encoder
+GAIN_EPSILON = 0.1
+
+
+def _copy_unchanged(input_path: str, output_path: str) -> bool:
+    """Reproduit le fichier tel quel : lien dur si possible, sinon copie."""
+    try:
+        if os.path.exists(output_path):
+            os.unlink(output_path)  # même sémantique que ffmpeg -y
+        os.link(input_path, output_path)
+        return True
+    except OSError:
+        try:
+            shutil.copy2(input_path, output_path)
+            return True
+        except OSError:
+            return False
+
+
+def process_corrections(valid_results: list, folder_path: str, mode: str, value: float,
+                        lossless: bool = False):
     """Applique les corrections audio (normalize ou boost)."""
-    
-    valid_results = [r for r in results if 'error' not in r]
+
     if not valid_results:
         print("❌ Aucun fichier à corriger")
         return
@@ -518,26 +986,50 @@ def process_corrections(results: list, folder_path: str, mode: str, value: float
     
     success = 0
     errors = 0
-    
-    for i, r in enumerate(valid_results, 1):
-        # Calcul du gain
-        if mode == "normalize":
-            gain = value - r['niveau_moyen_db']  # Gain pour atteindre la cible
-        else:
-            gain = value  # Boost fixe
-        
-        input_path = r['chemin']
-        output_path = output_dir / r['fichier']
-        
-        print_progress_bar(i, len(valid_results))
-        
-        if apply_audio_correction(input_path, gain, str(output_path)):
-            success += 1
-        else:
-            errors += 1
-    
+    skipped = 0
+    completed = 0
+
+    # Encodages concurrents : l'encodeur AAC de ffmpeg est déjà multithreadé,
+    # on ne prend donc que la moitié des cœurs pour éviter la sursouscription.
+    encode_workers = max(1, (os.cpu_count() or 2) // 2)
+
+    with ThreadPoolExecutor(max_workers=encode_workers) as executor:
+        futures = {}
+        for r in valid_results:
+            # Calcul du gain
+            if mode == "normalize":
+                gain = value - r['niveau_moyen_db']  # Gain pour atteindre la cible
+            else:
+                gain = value  # Boost fixe
+
+            output_path = output_dir / r['fichier']
+
+            # Fichier déjà au niveau cible : copie telle quelle, pas de ffmpeg
+            if mode == "normalize" and abs(gain) < GAIN_EPSILON:
+                futures[executor.submit(
+                    _copy_unchanged, r['chemin'], str(output_path)
+                )] = True
+            else:
+                futures[executor.submit(
+                    apply_audio_correction, r['chemin'], gain, str(output_path),
+                    lossless
+                )] = False
+
+        for future in as_completed(futures):
+            completed += 1
+            print_progress_bar(completed, len(valid_results))
+
+            if not future.result():
+                errors += 1
+            elif futures[future]:
+                skipped += 1
+            else:
+                success += 1
+
     print(f"\n\n✅ Correction terminée!")
     print(f"   • {success} fichier(s) corrigé(s)")
+    if skipped:
+        print(f"   • {skipped} fichier(s) déjà au niveau cible (copiés tels quels)")
     if errors:
         print(f"   • {errors} erreur(s)")
     print(f"   📂 {output_dir}")
@@ -557,9 +1049,16 @@ Options d'export:
   --json         Exporte aussi en JSON
   --no-html      Ne génère pas de rapport HTML
 
+Options d'analyse:
+  --no-cache     Force la ré-analyse (ignore le cache de résultats)
+  --full         Décodage intégral (désactive tags ReplayGain et échantillonnage)
+  --metrics      Mesure aussi RMS, LUFS intégré et pic réel (une seule passe)
+
 Options de correction audio:
   --normalize TARGET   Normalise vers le niveau cible (ex: --normalize -24)
   --boost GAIN         Applique un boost fixe (ex: --boost 10)
+  --lossless           Copie les flux et écrit le gain en tag ReplayGain
+                       (pas de ré-encodage, appliqué par le lecteur)
 
 Exemples:
   python audio_level_analyzer.py ./videos/
@@ -575,7 +1074,8 @@ Exemples:
     # Parse des options de correction
     normalize_target = None
     boost_value = None
-    
+    lossless = "--lossless" in sys.argv
+
     if "--normalize" in sys.argv:
         idx = sys.argv.index("--normalize")
         if idx + 1 < len(sys.argv):
@@ -597,13 +1097,20 @@ Exemples:
     if path.is_file():
         # Analyse d'un seul fichier
         print(f"\n⏳ Analyse de {path.name}...")
-        result = analyze_audio_level(target)
+        result = analyze_audio_level(target, full="--full" in sys.argv,
+                                     metrics="--metrics" in sys.argv)
         if 'error' in result:
             print(f"\n❌ Erreur: {result['error']}")
         else:
             print(f"\n✅ {result['fichier']}")
             print(f"   Niveau moyen: {result['niveau_moyen_db']:.1f} dB")
             print(f"   Niveau max:   {result['niveau_max_db']:.1f} dB")
+            if 'rms_db' in result:
+                print(f"   RMS:          {result['rms_db']:.1f} dB")
+            if 'lufs_integre' in result:
+                print(f"   LUFS intégré: {result['lufs_integre']:.1f} LUFS")
+            if 'pic_reel_db' in result:
+                print(f"   Pic réel:     {result['pic_reel_db']:.1f} dBFS")
             print(f"   {result['emoji']} {result['classification']}")
             
             # Correction si demandée
@@ -611,7 +1118,7 @@ Exemples:
                 gain = normalize_target - result['niveau_moyen_db']
                 output_path = path.parent / f"{path.stem}_normalized{path.suffix}"
                 print(f"\n🔧 Normalisation: +{gain:.1f} dB → {normalize_target} dB")
-                if apply_audio_correction(target, gain, str(output_path)):
+                if apply_audio_correction(target, gain, str(output_path), lossless):
                     print(f"✅ Fichier créé: {output_path}")
                 else:
                     print("❌ Erreur lors de la correction")
@@ -619,39 +1126,54 @@ Exemples:
             elif boost_value is not None:
                 output_path = path.parent / f"{path.stem}_boosted{path.suffix}"
                 print(f"\n🔧 Boost: +{boost_value:.1f} dB")
-                if apply_audio_correction(target, boost_value, str(output_path)):
+                if apply_audio_correction(target, boost_value, str(output_path), lossless):
                     print(f"✅ Fichier créé: {output_path}")
                 else:
                     print("❌ Erreur lors de la correction")
     
     elif path.is_dir():
         # Analyse d'un dossier
-        results = analyze_folder(target)
-        print_summary(results)
-        
+        results = analyze_folder(target,
+                                 use_cache="--no-cache" not in sys.argv,
+                                 full="--full" in sys.argv,
+                                 metrics="--metrics" in sys.argv)
+
+        # Partitionne une seule fois ; chaque consommateur reçoit sa liste
+        valid_results = []
+        errors = []
+        for r in results:
+            (errors if 'error' in r else valid_results).append(r)
+
+        print_summary(valid_results, errors)
+
         # Rapport HTML (par défaut)
         if "--no-html" not in sys.argv:
             html_path = path / "audio_report.html"
-            generate_html_report(results, str(path), str(html_path))
-        
+            generate_html_report(valid_results, errors, str(path), str(html_path))
+
         # Export CSV
         if "--csv" in sys.argv:
             csv_path = path / "audio_levels.csv"
-            export_csv(results, str(csv_path))
-        
+            export_csv(valid_results, str(csv_path))
+
         # Export JSON
         if "--json" in sys.argv:
             json_path = path / "audio_levels.json"
-            valid_results = [r for r in results if 'error' not in r]
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(valid_results, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                with open(json_path, 'wb') as f:
+                    f.write(orjson.dumps(valid_results, option=orjson.OPT_INDENT_2))
+            else:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    json.dump(valid_results, f, indent=2, ensure_ascii=False)
             print(f"📋 Export JSON: {json_path}")
-        
+
         # Correction audio
         if normalize_target is not None:
-            process_corrections(results, str(path), "normalize", normalize_target)
+            process_corrections(valid_results, str(path), "normalize", normalize_target,
+                                lossless)
         elif boost_value is not None:
-            process_corrections(results, str(path), "boost", boost_value)
+            process_corrections(valid_results, str(path), "boost", boost_value,
+                                lossless)
     
     else:
         print(f"❌ Chemin non trouvé: {target}")